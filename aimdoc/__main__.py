@@ -3,22 +3,15 @@
 Aimdoc CLI - Smart Documentation Scraper for AI Development
 """
 
+import functools
+import sys
 import typer
 from pathlib import Path
 from typing import Optional
 from rich.console import Console
 
-from .cli.commands import scrape_command
-
 console = Console()
 
-app = typer.Typer(
-    name="aimdoc",
-    help="🤖 Smart Documentation Scraper for AI Development",
-    add_completion=False,
-)
-
-@app.command()
 def scrape(
     url: Optional[str] = typer.Argument(None, help="URL of the documentation site to scrape"),
     name: Optional[str] = typer.Option(None, "--name", "-n", help="Project name (defaults to domain name)"),
@@ -29,20 +22,55 @@ def scrape(
     
     Interactive mode will prompt for missing arguments.
     """
+    # Deferred so that `version` and `--help` don't pay for importing Scrapy
+    from .cli.commands import scrape_command
     scrape_command(url, name, output_dir)
 
-@app.command()
 def version():
     """Show version information"""
     console.print("🤖 [bold blue]Aimdoc v2.0.0[/bold blue] - Smart Documentation Scraper for AI Development")
     console.print("💡 Now running locally - no server required!")
 
+COMMANDS = {
+    "scrape": scrape,
+    "version": version,
+}
+
+def _root():
+    """🤖 Smart Documentation Scraper for AI Development"""
+
+def _sniff_subcommand() -> Optional[str]:
+    """Return the subcommand named on the command line, if any"""
+    return sys.argv[1] if len(sys.argv) > 1 else None
+
+@functools.lru_cache(maxsize=None)
+def _build_app(cmd: Optional[str]) -> typer.Typer:
+    """
+    Build the Typer app, registering only the command that is about to run.
+    Cached so repeated invocations in one process (tests, daemon mode) reuse it.
+    """
+    app = typer.Typer(
+        name="aimdoc",
+        help="🤖 Smart Documentation Scraper for AI Development",
+        add_completion=False,
+    )
+    # Explicit callback keeps the app in group mode even with a single command
+    app.callback()(_root)
+    
+    if cmd in COMMANDS:
+        app.command()(COMMANDS[cmd])
+    else:
+        # --help, no arguments or an unknown command: register everything
+        for command in COMMANDS.values():
+            app.command()(command)
+    return app
+
 def main():
     """Entry point for the CLI"""
     try:
-        app()
+        _build_app(_sniff_subcommand())()
     except KeyboardInterrupt:
         console.print("\n👋 [yellow]Goodbye![/yellow]")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
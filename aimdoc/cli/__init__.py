@@ -1 +1,11 @@
-# CLI package
\ No newline at end of file
+# CLI package
+import importlib
+
+_LAZY_SUBMODULES = ("commands", "progress")
+
+
+def __getattr__(name):
+    """Lazily import heavy CLI submodules on first attribute access"""
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
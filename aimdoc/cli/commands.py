@@ -2,40 +2,43 @@
 CLI commands for Aimdoc
 """
 
-import tempfile
-import json
+import functools
+import os
+from collections import defaultdict
 from pathlib import Path
 from typing import Optional
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
-from rich.panel import Panel
-from rich.align import Align
 
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-
-from .utils import extract_domain_name, is_valid_url, ensure_output_dir
-from .progress import set_cli_progress_callback
-from ..spiders.aimdoc import AimdocSpider
+from .utils import split_url, extract_domain_name_parts, is_valid_url_parts, ensure_output_dir
 
 console = Console()
 
+# Maps filename separators to spaces when deriving README link titles
+_TITLE_TABLE = str.maketrans("_-", "  ")
+
 def scrape_command(url: Optional[str] = None, name: Optional[str] = None, output_dir: str = "./docs"):
     """
     Main scrape command - handles the complete scraping workflow
     """
+    from rich.console import Group
+    from rich.panel import Panel
+    from rich.text import Text
+
     try:
         # Get URL interactively if not provided
         if not url:
             url = Prompt.ask("📍 Documentation URL")
         
-        if not is_valid_url(url):
+        # Parse once and share the result between validation and naming
+        url_parts = split_url(url)
+        if not is_valid_url_parts(url_parts):
             console.print("❌ [red]Invalid URL provided[/red]")
             return
         
         # Get project name
         if not name:
-            default_name = extract_domain_name(url)
+            default_name = extract_domain_name_parts(url_parts)
             name = Prompt.ask("📝 Project name", default=default_name)
         
         # Get output directory
@@ -74,13 +77,17 @@ def scrape_command(url: Optional[str] = None, name: Optional[str] = None, output
         # Start the scraping process with absolute path
         _run_scrapy_spider(url, name, str(output_path.resolve()))
         
-        # Show final success message
-        console.print(f"\n🎉 [bold green]Success![/bold green] Documentation saved to [bold]{final_path.resolve()}[/bold]")
+        # Show final success message (buffered into a single print)
+        final_lines = [
+            Text.from_markup(f"\n🎉 [bold green]Success![/bold green] Documentation saved to [bold]{final_path.resolve()}[/bold]")
+        ]
         
         # Generate README suggestion
         readme_path = final_path / "README.md"
         if readme_path.exists():
-            console.print(f"📖 Index file created: [cyan]{readme_path}[/cyan]")
+            final_lines.append(Text.from_markup(f"📖 Index file created: [cyan]{readme_path}[/cyan]"))
+        
+        console.print(Group(*final_lines))
         
     except KeyboardInterrupt:
         console.print("\n⚠️  [yellow]Operation cancelled by user[/yellow]")
@@ -88,163 +95,157 @@ def scrape_command(url: Optional[str] = None, name: Optional[str] = None, output
         console.print(f"\n❌ [red]Error:[/red] {str(e)}")
         raise
 
+@functools.lru_cache(maxsize=1)
+def _get_aimdoc_settings() -> dict:
+    """
+    Build the settings dict from aimdoc.settings (instead of relying on project discovery).
+    Cached so repeated crawls in the same process skip the module introspection.
+    """
+    from aimdoc import settings as aimdoc_settings
+    return {name: value for name, value in vars(aimdoc_settings).items() if name.isupper()}
+
 def _run_scrapy_spider(url: str, name: str, output_dir: str):
     """
     Run the Scrapy spider with CLI integration
     """
-    # Create temporary manifest for compatibility with existing spider
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-        manifest = {
-            "url": url,
-            "name": name
-        }
-        json.dump(manifest, f)
-        manifest_path = f.name
+    # Scrapy pulls in Twisted, lxml and the whole pipeline graph - only load it when crawling
+    from scrapy import signals
+    from scrapy.crawler import CrawlerProcess
+
+    from .progress import set_cli_progress_callback
+    from ..spiders.aimdoc import AimdocSpider
+
+    # Create and configure the crawler process with aimdoc settings
+    process = CrawlerProcess(_get_aimdoc_settings())
     
-    try:
-        # Force aimdoc settings instead of relying on project discovery
-        from aimdoc import settings as aimdoc_settings
-        
-        # Create settings dict from aimdoc.settings module
-        settings_dict = {}
-        for setting_name in dir(aimdoc_settings):
-            if setting_name.isupper():
-                settings_dict[setting_name] = getattr(aimdoc_settings, setting_name)
-        
-        # Create and configure the crawler process with aimdoc settings
-        process = CrawlerProcess(settings_dict)
-        
-        # Set up CLI progress callback (we'll get spider instance later)
-        progress_callback = None
-        
-        # Progress callback will be set up after spider creation
-        
-        # Add custom signal handlers for phase transitions
-        def handle_spider_opened(spider):
-            """Handle spider opened signal"""
-            progress_callback.start_discovery()
-        
-        def handle_spider_closed(spider, reason):
-            """Handle spider closed signal"""
-            if reason == 'finished':
-                # Extract final stats for summary
-                stats = spider.crawler.stats.get_stats()
-                
-                # Get files created directly from AssemblePipeline if available
-                files_created = stats.get('files_created', 0)
-                if hasattr(spider.crawler, '_assemble_pipeline_files_created'):
-                    files_created = spider.crawler._assemble_pipeline_files_created
-                
-                summary = {
-                    'files_created': files_created,
-                    'pages_scraped': stats.get('progress_pages_scraped', 0),
-                    'pages_discovered': stats.get('progress_pages_found', 0),
-                    'pages_failed': stats.get('downloader/exception_count', 0)
-                }
-                progress_callback.complete(success=True, summary=summary)
-            else:
-                progress_callback.show_error(f"Spider closed with reason: {reason}")
-        
-        # Connect signals
-        from scrapy import signals
-        
-        # Create a custom spider class with CLI output directory
-        class CLIAimdocSpider(AimdocSpider):
-            def __init__(self, *args, **kwargs):
-                super().__init__(*args, **kwargs)
-                self._cli_output_dir = output_dir
-        
-        process.crawl(CLIAimdocSpider, manifest=manifest_path)
-        
-        # Connect signals to the crawler
-        crawler = list(process.crawlers)[0]  # Get the crawler we just added
-        spider = crawler.spider  # Get the actual spider instance
-        
-        # Set up CLI progress callback now that we have the spider
-        progress_callback = set_cli_progress_callback(spider)
-        
-        crawler.signals.connect(handle_spider_opened, signal=signals.spider_opened)
-        crawler.signals.connect(handle_spider_closed, signal=signals.spider_closed)
-        
-        # Also handle stats updates for phase transitions
-        def handle_stats_update(stats, spider):
-            """Handle stats updates for phase detection"""
-            pages_found = stats.get('progress_pages_found', 0)
-            pages_scraped = stats.get('progress_pages_scraped', 0)
+    # Set up CLI progress callback (we'll get spider instance later)
+    progress_callback = None
+    
+    # Progress callback will be set up after spider creation
+    
+    # Add custom signal handlers for phase transitions
+    def handle_spider_opened(spider):
+        """Handle spider opened signal"""
+        progress_callback.start_discovery()
+    
+    def handle_spider_closed(spider, reason):
+        """Handle spider closed signal"""
+        if reason == 'finished':
+            # Extract final stats for summary
+            stats = spider.crawler.stats.get_stats()
+            
+            # Get files created directly from AssemblePipeline if available
             files_created = stats.get('files_created', 0)
+            if hasattr(spider.crawler, '_assemble_pipeline_files_created'):
+                files_created = spider.crawler._assemble_pipeline_files_created
             
-            if pages_found > 0 and pages_scraped == 0:
-                # Discovery phase completed, start scraping
-                if not hasattr(spider, '_scraping_started'):
-                    progress_callback.start_scraping()
-                    spider._scraping_started = True
-            elif files_created > 0 and pages_scraped > 0:
-                # Start conversion phase
-                if not hasattr(spider, '_conversion_started'):
-                    progress_callback.start_conversion()
-                    spider._conversion_started = True
-        
-        # Note: Scrapy doesn't have a direct stats_changed signal, so we rely on pipeline callbacks
-        
-        # Start the crawling process
-        process.start()
-        
-    finally:
-        # Clean up temporary manifest file
-        try:
-            Path(manifest_path).unlink()
-        except:
-            pass
+            summary = {
+                'files_created': files_created,
+                'pages_scraped': stats.get('progress_pages_scraped', 0),
+                'pages_discovered': stats.get('progress_pages_found', 0),
+                'pages_failed': stats.get('downloader/exception_count', 0)
+            }
+            progress_callback.complete(success=True, summary=summary)
+        else:
+            progress_callback.show_error(f"Spider closed with reason: {reason}")
+    
+    # Create a custom spider class with CLI output directory
+    class CLIAimdocSpider(AimdocSpider):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._cli_output_dir = output_dir
+    
+    process.crawl(CLIAimdocSpider, manifest_data={"url": url, "name": name})
+    
+    # Connect signals to the crawler
+    crawler = next(iter(process.crawlers))  # Get the crawler we just added
+    spider = crawler.spider  # Get the actual spider instance
+    
+    # Set up CLI progress callback now that we have the spider
+    progress_callback = set_cli_progress_callback(spider)
+    
+    crawler.signals.connect(handle_spider_opened, signal=signals.spider_opened)
+    crawler.signals.connect(handle_spider_closed, signal=signals.spider_closed)
+    
+    # Also handle stats updates for phase transitions
+    def handle_stats_update(stats, spider):
+        """Handle stats updates for phase detection"""
+        pages_found = stats.get('progress_pages_found', 0)
+        pages_scraped = stats.get('progress_pages_scraped', 0)
+        files_created = stats.get('files_created', 0)
+        
+        if pages_found > 0 and pages_scraped == 0:
+            # Discovery phase completed, start scraping
+            if not hasattr(spider, '_scraping_started'):
+                progress_callback.start_scraping()
+                spider._scraping_started = True
+        elif files_created > 0 and pages_scraped > 0:
+            # Start conversion phase
+            if not hasattr(spider, '_conversion_started'):
+                progress_callback.start_conversion()
+                spider._conversion_started = True
+    
+    # Note: Scrapy doesn't have a direct stats_changed signal, so we rely on pipeline callbacks
+    
+    # Start the crawling process
+    process.start()
+
+def _walk_md(root):
+    """Yield the path of every markdown file under root, except README.md files"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.md') and entry.name != 'README.md':
+                    yield entry.path
 
 def _generate_readme(output_path: Path, project_name: str):
     """Generate a README.md file with documentation index"""
     readme_path = output_path / "README.md"
     
-    # Find all markdown files
+    # Collect markdown files as (directory, filename) pairs relative to output_path
     md_files = []
-    for md_file in output_path.rglob("*.md"):
-        if md_file.name != "README.md":
-            relative_path = md_file.relative_to(output_path)
-            md_files.append(relative_path)
+    for md_path in _walk_md(output_path):
+        md_files.append(os.path.split(os.path.relpath(md_path, output_path)))
     
-    # Sort files
-    md_files.sort()
-    
-    # Generate README content
-    readme_content = f"""# {project_name} Documentation
+    # Generate README content as a list of fragments joined once at the end
+    parts = [f"""# {project_name} Documentation
 
 Generated on {Path().cwd().name} by [Aimdoc](https://github.com/clemeverger/aimdoc)
 
 ## 📁 Structure
 
-"""
+"""]
     
     # Group by directory
-    dirs = {}
-    for file_path in md_files:
-        dir_name = str(file_path.parent) if file_path.parent != Path(".") else "root"
-        if dir_name not in dirs:
-            dirs[dir_name] = []
-        dirs[dir_name].append(file_path)
+    dirs = defaultdict(list)
+    for dir_name, file_name in md_files:
+        dirs[dir_name or "root"].append(file_name)
     
     # Add directory sections
     for dir_name, files in sorted(dirs.items()):
         if dir_name == "root":
-            readme_content += "### Root Files\n\n"
+            parts.append("### Root Files\n\n")
+            prefix = ""
         else:
-            readme_content += f"### {dir_name}\n\n"
+            parts.append(f"### {dir_name}\n\n")
+            prefix = dir_name + os.sep
         
-        for file_path in sorted(files):
-            file_title = file_path.stem.replace('_', ' ').replace('-', ' ').title()
-            readme_content += f"- [{file_title}](./{file_path})\n"
+        for file_name in sorted(files):
+            file_title = os.path.splitext(file_name)[0].translate(_TITLE_TABLE).title()
+            parts.append(f"- [{file_title}](./{prefix}{file_name})\n")
         
-        readme_content += "\n"
+        parts.append("\n")
     
-    readme_content += """---
+    parts.append("""---
 
 *Documentation scraped and organized by [Aimdoc](https://github.com/clemeverger/aimdoc)*
-"""
+""")
     
-    # Write README
-    with open(readme_path, 'w', encoding='utf-8') as f:
-        f.write(readme_content)
\ No newline at end of file
+    # Write README in a single call to a temp file, then atomically swap it in
+    tmp_path = readme_path.with_suffix(".md.tmp")
+    tmp_path.write_text("".join(parts), encoding='utf-8')
+    os.replace(tmp_path, readme_path)
\ No newline at end of file
@@ -2,6 +2,7 @@
 Rich-based progress tracking for CLI mode
 """
 
+import time
 from typing import Optional, Callable
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
@@ -16,6 +17,13 @@ class CLIProgressTracker:
     Progress tracker that integrates with Rich for beautiful CLI progress display
     """
     
+    # Redraw at most every MIN_RENDER_INTERVAL seconds, or after RENDER_EVERY pending updates
+    MIN_RENDER_INTERVAL = 0.1
+    RENDER_EVERY = 25
+    
+    # When stdout is not a terminal, log a plain line every LOG_EVERY items instead
+    LOG_EVERY = 100
+    
     def __init__(self):
         self.progress: Optional[Progress] = None
         self.discovery_task = None
@@ -26,6 +34,47 @@ class CLIProgressTracker:
         self.pages_scraped = 0
         self.files_created = 0
         
+        # Throttling state: time of the last redraw and updates received since then
+        self._last_update_ts = 0.0
+        self._pending = 0
+        
+        # Last count logged per action, since the same count can be reported repeatedly
+        # (e.g. files_created for pages that produced no file)
+        self._last_logged = {}
+    
+    def _should_render(self, is_final: bool = False) -> bool:
+        """Coalesce Rich redraws, always letting the final count through"""
+        self._pending += 1
+        now = time.monotonic()
+        if (not is_final
+                and self._pending < self.RENDER_EVERY
+                and now - self._last_update_ts < self.MIN_RENDER_INTERVAL):
+            return False
+        self._last_update_ts = now
+        self._pending = 0
+        return True
+    
+    def _log_milestone(self, action: str, count: int, noun: str = "pages"):
+        """Plain progress lines for non-terminal output, where the live display is disabled"""
+        if console.is_terminal or count % self.LOG_EVERY or self._last_logged.get(action) == count:
+            return
+        self._last_logged[action] = count
+        if self.pages_found > 0:
+            console.print(f"{action} {count}/{self.pages_found} {noun}")
+        else:
+            console.print(f"{action} {count} {noun}")
+    
+    def flush(self):
+        """Force a redraw with the latest counts so the display never ends on a stale value"""
+        if self.progress is None:
+            return
+        self._render_discovery()
+        self._render_scraping()
+        self._render_conversion()
+        self.progress.refresh()
+        self._last_update_ts = time.monotonic()
+        self._pending = 0
+        
     def start_discovery(self):
         """Start the discovery phase"""
         if self.progress is None:
@@ -33,6 +82,11 @@ class CLIProgressTracker:
                 SpinnerColumn(),
                 TextColumn("[bold blue]{task.description}"),
                 console=console,
+                # Redraws are driven explicitly from the (throttled) update methods
+                # instead of a background thread contending with the Twisted reactor
+                auto_refresh=False,
+                # No live display (spinner frames, ANSI redraws) when piped to CI logs or files
+                disable=not console.is_terminal,
             )
             self.progress.start()
         
@@ -40,14 +94,22 @@ class CLIProgressTracker:
             "🔍 Discovering pages...", 
             total=None
         )
+        self.progress.refresh()
     
     def update_discovery(self, pages_found: int):
         """Update discovery progress"""
         self.pages_found = pages_found
+        if not self._should_render():
+            return
+        if self.discovery_task is not None:
+            self._render_discovery()
+            self.progress.refresh()
+    
+    def _render_discovery(self):
         if self.discovery_task is not None:
             self.progress.update(
                 self.discovery_task, 
-                description=f"🔍 Found {pages_found} pages to scrape"
+                description=f"🔍 Found {self.pages_found} pages to scrape"
             )
     
     def start_scraping(self):
@@ -55,6 +117,7 @@ class CLIProgressTracker:
         if self.discovery_task is not None:
             self.progress.update(self.discovery_task, completed=True)
             self.progress.remove_task(self.discovery_task)
+            self.discovery_task = None
         
         if self.pages_found > 0:
             self.scraping_task = self.progress.add_task(
@@ -66,46 +129,69 @@ class CLIProgressTracker:
                 "🕷️  Scraping pages...", 
                 total=None
             )
+        self.progress.refresh()
     
     def update_scraping(self, pages_scraped: int):
         """Update scraping progress"""
         self.pages_scraped = pages_scraped
+        self._log_milestone("🕷️  Scraped", pages_scraped)
+        if not self._should_render(is_final=pages_scraped == self.pages_found):
+            return
         if self.scraping_task is not None:
-            if self.pages_found > 0:
-                self.progress.update(
-                    self.scraping_task,
-                    completed=pages_scraped,
-                    description=f"🕷️  Scraped {pages_scraped}/{self.pages_found} pages"
-                )
-            else:
-                self.progress.update(
-                    self.scraping_task,
-                    description=f"🕷️  Scraped {pages_scraped} pages"
-                )
+            self._render_scraping()
+            self.progress.refresh()
+    
+    def _render_scraping(self):
+        if self.scraping_task is None:
+            return
+        if self.pages_found > 0:
+            self.progress.update(
+                self.scraping_task,
+                completed=self.pages_scraped,
+                description=f"🕷️  Scraped {self.pages_scraped}/{self.pages_found} pages"
+            )
+        else:
+            self.progress.update(
+                self.scraping_task,
+                description=f"🕷️  Scraped {self.pages_scraped} pages"
+            )
     
     def start_conversion(self):
         """Transition to conversion phase"""
+        self.flush()
         if self.scraping_task is not None:
             self.progress.update(self.scraping_task, completed=True)
             self.progress.remove_task(self.scraping_task)
+            self.scraping_task = None
         
         self.conversion_task = self.progress.add_task(
             "📝 Converting to markdown...", 
             total=None
         )
+        self.progress.refresh()
     
     def update_conversion(self, files_created: int):
         """Update conversion progress"""
         self.files_created = files_created
+        self._log_milestone("📝 Created", files_created, "markdown files")
+        if not self._should_render(is_final=files_created == self.pages_found):
+            return
+        if self.conversion_task is not None:
+            self._render_conversion()
+            self.progress.refresh()
+    
+    def _render_conversion(self):
         if self.conversion_task is not None:
             self.progress.update(
                 self.conversion_task,
-                description=f"📝 Created {files_created} markdown files"
+                description=f"📝 Created {self.files_created} markdown files"
             )
     
     def complete(self, success: bool = True, summary: Optional[dict] = None):
         """Complete all progress tracking"""
         if self.progress is not None:
+            self.flush()
+            
             # Clean up any remaining tasks
             for task_id in [self.discovery_task, self.scraping_task, self.conversion_task]:
                 if task_id is not None:
@@ -152,15 +238,14 @@ class CLIProgressTracker:
     def show_error(self, error: str):
         """Show error message"""
         if self.progress is not None:
+            self.flush()
             self.progress.stop()
             self.progress = None
         
         console.print(f"❌ [bold red]Error:[/bold red] {error}")
 
-# Global progress tracker instance for CLI mode
-cli_progress = CLIProgressTracker()
-
 def set_cli_progress_callback(spider):
-    """Set up CLI progress tracking for a spider"""
-    spider._cli_progress_callback = cli_progress
-    return cli_progress
\ No newline at end of file
+    """Set up CLI progress tracking for a spider (one tracker per spider)"""
+    tracker = CLIProgressTracker()
+    spider._cli_progress_callback = tracker
+    return tracker
\ No newline at end of file
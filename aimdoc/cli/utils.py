@@ -3,41 +3,57 @@ CLI utilities and helpers
 """
 
 import re
-from urllib.parse import urlparse
+from urllib.parse import urlsplit, SplitResult
 from pathlib import Path
+from typing import Optional
 from rich.console import Console
 
 console = Console()
 
+# Compiled once at import time for extract_domain_name_parts
+_TLD_RE = re.compile(r'\.(com|org|net|io|dev|tech|ai)$')
+_UNSAFE_CHARS_RE = re.compile(r'[^a-zA-Z0-9\-_]')
+
+def split_url(url: str) -> Optional[SplitResult]:
+    """Parse URL once so the result can be shared by the *_parts helpers"""
+    try:
+        return urlsplit(url)
+    except Exception:
+        return None
+
 def extract_domain_name(url: str) -> str:
     """Extract a clean domain name from URL for use as project name"""
+    return extract_domain_name_parts(split_url(url))
+
+def extract_domain_name_parts(parts: Optional[SplitResult]) -> str:
+    """Extract a clean domain name from an already parsed URL"""
+    if parts is None:
+        return "docs"
     try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
+        domain = parts.netloc.lower()
         
         # Remove www prefix if present
-        domain = re.sub(r'^www\.', '', domain)
+        if domain.startswith('www.'):
+            domain = domain[4:]
         
         # Remove common TLD extensions for cleaner names
-        domain = re.sub(r'\.(com|org|net|io|dev|tech|ai)$', '', domain)
+        domain = _TLD_RE.sub('', domain)
         
         # Convert to a safe filesystem name
-        domain = re.sub(r'[^a-zA-Z0-9\-_]', '_', domain)
-        
-        return domain or "docs"
+        return _UNSAFE_CHARS_RE.sub('_', domain) or "docs"
     except Exception:
         return "docs"
 
 def is_valid_url(url: str) -> bool:
     """Check if URL is valid"""
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except Exception:
-        return False
+    return is_valid_url_parts(split_url(url))
+
+def is_valid_url_parts(parts: Optional[SplitResult]) -> bool:
+    """Check if an already parsed URL is valid"""
+    return parts is not None and all([parts.scheme, parts.netloc])
 
 def ensure_output_dir(output_dir: str) -> Path:
     """Ensure output directory exists and is writable"""
     path = Path(output_dir).expanduser().resolve()
     path.mkdir(parents=True, exist_ok=True)
-    return path
\ No newline at end of file
+    return path
@@ -1,14 +1,21 @@
-import scrapy
+import sys
+from dataclasses import dataclass
+from typing import Optional
 
+# Slotted dataclasses need Python 3.10+; older interpreters get a regular dataclass
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-class DocPage(scrapy.Item):
-    url = scrapy.Field()
-    status = scrapy.Field()
-    fetched_at = scrapy.Field()
-    etag = scrapy.Field()
-    last_modified = scrapy.Field()
-    title = scrapy.Field()
-    html = scrapy.Field()
-    md = scrapy.Field()
-    order = scrapy.Field()  # position selon sidebar
-    hash = scrapy.Field()   # hash du HTML nettoyé
\ No newline at end of file
+
+@dataclass(**_SLOTS)
+class DocPage:
+    """Scraped documentation page (Scrapy handles dataclass items via itemadapter)"""
+    url: str
+    status: Optional[int] = None
+    fetched_at: str = ""
+    etag: str = ""
+    last_modified: str = ""
+    title: str = ""
+    html: str = ""
+    md: Optional[str] = None  # set by the markdown pipeline
+    order: int = 999  # position selon sidebar
+    hash: str = ""    # hash du HTML nettoyé
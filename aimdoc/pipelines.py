@@ -1,7 +0,0 @@
-from aimdoc.pipelines.assemble import AssemblePipeline
-from aimdoc.pipelines.diff import DiffPipeline
-
-__all__ = [
-    'AssemblePipeline',
-    'DiffPipeline'
-]
\ No newline at end of file
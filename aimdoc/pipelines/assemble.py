@@ -1,37 +1,113 @@
+from __future__ import annotations
+
+import functools
 import os
-from pathlib import Path
-from urllib.parse import urlparse
 import re
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+from ..utils import parse_url
+
+# Case-insensitive '/docs/' segment, for paths the ASCII fast path can't handle
+_DOCS_SEGMENT_RE = re.compile(r'/docs/', re.IGNORECASE)
+
+# os.writev is POSIX-only; elsewhere the chunks are written one by one
+_HAS_WRITEV = hasattr(os, 'writev')
+
+
+def _noop(*args, **kwargs):
+    """Stand-in for an unavailable stats collector method."""
+
+
+@functools.lru_cache(maxsize=4096)
+def _url_to_relpath(url: str) -> str | None:
+    """
+    Map a URL to its markdown path relative to the output directory, or None
+    when it has no '/docs/' segment. Cached since retries, redirects and
+    sitemap cross-references re-emit the same URLs.
+    """
+    path_str = parse_url(url).path
+    
+    # Find the '/docs/' segment (case-insensitive) and take everything after it.
+    # For ASCII paths a plain substring scan is enough (the lowercased copy is only
+    # built for paths that contain uppercase). Lowercasing can change the length of
+    # non-ASCII text ('İ' becomes two code points), so those paths use the regex.
+    if path_str.isascii():
+        haystack = path_str if path_str.islower() else path_str.lower()
+        docs_index = haystack.find('/docs/')
+        if docs_index < 0:
+            return None
+        docs_end = docs_index + len('/docs/')
+    else:
+        match = _DOCS_SEGMENT_RE.search(path_str)
+        if not match:
+            return None
+        docs_end = match.end()
+    
+    # The relative path is the part after '/docs/', with its original case.
+    relative_path = path_str[docs_end:]
+
+    if not relative_path:
+        return 'index.md'
+
+    if relative_path.endswith('/'):
+        return relative_path + 'index.md'
+    
+    # Add '.md' when the last component has no extension. Same rules as Path.suffix
+    # (a leading or trailing dot doesn't count), without building PurePath objects.
+    tail = relative_path[relative_path.rfind('/') + 1:]
+    dot = tail.rfind('.')
+    if dot <= 0 or dot == len(tail) - 1:
+        return relative_path + '.md'
+
+    return relative_path
+
 
 class AssemblePipeline:
     """
     Optimized pipeline to assemble markdown files with streaming processing.
     Processes pages immediately instead of accumulating in memory.
+    File writes are handed to a small thread pool so disk latency overlaps with crawling.
     """
 
+    # Number of background threads writing markdown files: enough to keep several
+    # writes in flight on SSDs, capped so small machines aren't oversubscribed
+    WRITE_WORKERS = min(8, os.cpu_count() or 1)
+
+    # Characters that must be escaped inside a double-quoted YAML scalar
+    _YAML_ESCAPES = str.maketrans({'"': '\\"', '\\': '\\\\'})
+
+    # Static front-matter fragments, pre-encoded once for every file written
+    _FM_TITLE = b'---\ntitle: "'
+    _FM_URL = b'"\nurl: '
+    _FM_BODY = b'\n---\n\n'
+
     def __init__(self):
         self.output_dir = None
         self.files_created_count = 0
-        
-        # Pre-compile regex patterns for performance
-        self._docs_pattern = re.compile(r'(/docs/)(.*)', re.IGNORECASE)
+        # Parent directories already created, to skip redundant mkdir syscalls
+        self._ensured_dirs = set()
 
     def open_spider(self, spider):
         """Initialize the pipeline and create the main output directory."""
         self.spider = spider
         self.manifest = spider.manifest
-
-        project_name = self.manifest.get('name', 'default-project')
         
-        # For CLI mode, use output directory passed from CLI
+        # Bind per-page lookups once
+        self._log_error = spider.logger.error
+        self._log_warning = spider.logger.warning
+        self._project_name = project_name = self.manifest.get('name', 'default-project')
+        
+        # For CLI mode, use output directory passed from CLI.
+        # absolute() is enough for writing files; resolve() would stat every path component.
         if hasattr(spider, '_cli_output_dir'):
-            output_base = Path(spider._cli_output_dir).resolve()
+            output_base = Path(spider._cli_output_dir).absolute()
             spider.logger.info(f"CLI mode: Using output directory: {output_base}")
             self.output_dir = output_base / project_name
         else:
             # Fallback for API mode - use job directory with better error handling
             if hasattr(spider, 'job_dir') and spider.job_dir:
-                job_dir = Path(spider.job_dir).resolve()
+                job_dir = Path(spider.job_dir).absolute()
                 spider.logger.info(f"API mode: Using job directory: {job_dir}")
             else:
                 # Use a safe default instead of getcwd() for better global install compatibility
@@ -43,43 +119,120 @@ class AssemblePipeline:
             docs_dir.mkdir(parents=True, exist_ok=True)
             self.output_dir = docs_dir / project_name
         
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        spider.logger.info(f"Final output directory: {self.output_dir.resolve()}")
+        self._ensure_dir(self.output_dir)
+        spider.logger.info(f"Final output directory: {self.output_dir}")
+        
+        # Resolve the stats increment once instead of probing for it on every page;
+        # a no-op stands in so the per-page path needs no branch
+        self._inc_stat = getattr(spider.crawler.stats, 'inc_value', None) or _noop
+        
+        # Pending background writes as (future, target_path) pairs
+        self._io_pool = ThreadPoolExecutor(max_workers=self.WRITE_WORKERS, thread_name_prefix='aimdoc-write')
+        self._write_futures = []
+        # Latest write submitted per target path. Distinct URLs can map to the same file
+        # (query strings, 'a/' vs 'a/index'), so a new write waits for the previous one
+        self._last_write_by_path = {}
 
     def process_item(self, item, spider):
         """Process pages immediately without storing metadata."""
-        if 'md' in item:  # Process if md field exists, even if empty
+        if item.md:  # Pages without markdown would only produce a front-matter stub
             # Process the page immediately to save memory
             self._process_page_immediately(item)
         return item
     
     def _process_page_immediately(self, page):
         """Process and write a single page to disk immediately."""
-        file_path = self._get_path_from_url(page['url'])
+        file_path = self._get_path_from_url(page.url)
         if not file_path:
             return
 
         target_path = self.output_dir / file_path
-        target_path.parent.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(target_path.parent)
+
+        # Escape for the double-quoted YAML title; most titles contain neither character
+        title = page.title or ''
+        if '"' in title or '\\' in title:
+            title = title.translate(self._YAML_ESCAPES)
+
+        # Write in the background; failures are reconciled in close_spider
+        previous = self._last_write_by_path.get(target_path)
+        future = self._io_pool.submit(self._write_file_after, previous, target_path, title, page.url, page.md)
+        self._last_write_by_path[target_path] = future
+        self._write_futures.append((future, target_path))
+        
+        # Update file creation count using Scrapy stats instead of I/O
+        self.files_created_count += 1
+        self._inc_stat('files_created')
+
+    def _ensure_dir(self, directory):
+        """Create a directory (and parents) unless this pipeline already did."""
+        if directory in self._ensured_dirs:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        # mkdir(parents=True) also guarantees every ancestor exists
+        self._ensured_dirs.add(directory)
+        self._ensured_dirs.update(directory.parents)
 
-        title = self._escape_yaml(page.get('title', 'Untitled'))
-        content = f'---\ntitle: "{title}"\nurl: {page["url"]}\n---\n\n{page["md"]}'
+    @classmethod
+    def _write_file_after(cls, previous, target_path, title, url, md):
+        """
+        Write a file once the previous write to the same path (if any) has finished,
+        so concurrent writes never interleave and the last page submitted wins.
+        """
+        if previous is not None:
+            wait([previous])
+        cls._write_file(target_path, title, url, md)
 
+    @classmethod
+    def _write_file(cls, target_path, title, url, md):
+        """
+        Write a single markdown file (runs in the I/O thread pool).
+        Bypasses the text I/O layer: each part is encoded once and written straight to the fd,
+        without first concatenating front matter and body into one large string.
+        """
+        chunks = [
+            cls._FM_TITLE, title.encode('utf-8'),
+            cls._FM_URL, url.encode('utf-8'),
+            cls._FM_BODY, md.encode('utf-8'),
+        ]
+        # 0o666 like open(..., 'w'), so the umask alone decides the file mode
+        fd = os.open(os.fspath(target_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
         try:
-            with open(target_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            # Update file creation count using Scrapy stats instead of I/O
-            self.files_created_count += 1
-            if hasattr(self.spider.crawler.stats, 'inc_value'):
-                self.spider.crawler.stats.inc_value('files_created')
-        except OSError as e:
-            self.spider.logger.error(f"Failed to write file {target_path}: {e}")
+            if _HAS_WRITEV:
+                # Front matter and body go out in a single scatter-gather syscall
+                written = os.writev(fd, chunks)
+                if written == sum(map(len, chunks)):
+                    return
+                # Short write (rare): finish the remainder with plain writes below
+                chunks = [memoryview(b''.join(chunks))[written:]]
+            for chunk in chunks:
+                data = memoryview(chunk)
+                # os.write may write fewer bytes than requested, so loop until done
+                while data:
+                    written = os.write(fd, data)
+                    data = data[written:]
+        finally:
+            os.close(fd)
+
+    def _wait_for_writes(self):
+        """Block until all background writes are done and undo the accounting of failed ones."""
+        for future, target_path in self._write_futures:
+            error = future.exception()
+            if error is not None:
+                self._log_error(f"Failed to write file {target_path}: {error}")
+                self.files_created_count -= 1
+                self._inc_stat('files_created', -1)
+        
+        self._write_futures = []
+        self._last_write_by_path = {}
+        self._io_pool.shutdown(wait=True)
 
     def close_spider(self, spider):
         """
         Finalize the assembly process.
-        Individual markdown files are already created during processing.
+        Individual markdown files are already submitted during processing.
         """
+        self._wait_for_writes()
         spider.logger.info(f"Assembly completed: Generated {self.files_created_count} files")
         
         # Store the final count in the crawler for CLI access
@@ -93,33 +246,8 @@ class AssemblePipeline:
         Converts a URL containing '/docs/' into a relative filesystem path.
         Example: https://example.com/a/b/docs/foo/bar/ -> foo/bar/index.md
         """
-        parsed_url = urlparse(url)
-        path_str = parsed_url.path
-        
-        # Find the '/docs/' segment and take everything after it (use pre-compiled regex).
-        match = self._docs_pattern.search(path_str)
-        if not match:
-            self.spider.logger.warning(f"URL '{url}' does not contain '/docs/' segment. Skipping.")
+        relative_path = _url_to_relpath(url)
+        if relative_path is None:
+            self._log_warning(f"URL '{url}' does not contain '/docs/' segment. Skipping.")
             return None
-        
-        # The relative path is the part after '/docs/'.
-        relative_path = match.group(2)
-
-        if not relative_path:
-            return Path('index.md')
-
-        if relative_path.endswith('/'):
-            return Path(relative_path + 'index.md')
-        
-        path = Path(relative_path)
-        if not path.suffix:
-            return path.with_suffix('.md')
-
-        return path
-
-    def _escape_yaml(self, text: str) -> str:
-        """Basic escaping for YAML strings."""
-        if not text:
-            return ''
-        return text.replace('"', '\\"')
-
+        return Path(relative_path)
@@ -1,17 +1,67 @@
+import functools
 import json
 import os
+import string
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List
-from urllib.parse import urlparse
+from typing import List, NamedTuple, Optional
+
+from ..utils import parse_url
+
+# Leading host labels that don't identify the site (docs.example.com -> example)
+_HOST_PREFIXES = frozenset(['www', 'docs', 'api', 'blog', 'help', 'support'])
+
+
+class _DomainCharTable(dict):
+    """str.translate table keeping [a-zA-Z0-9-_] and mapping any other character to '-'"""
+    
+    def __missing__(self, codepoint):
+        return ord('-')
+
+
+_DOMAIN_CHAR_TABLE = _DomainCharTable(
+    (ord(c), ord(c)) for c in string.ascii_letters + string.digits + '-_'
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _extract_domain_principal(netloc):
+    """
+    Map a netloc to a filesystem-safe domain name.
+    Pure function of the host, and a crawl only sees a handful of them, so it is cached.
+    """
+    hostname = netloc.split(':')[0]
+    parts = hostname.split('.')
+    
+    if len(parts) < 2:
+        return hostname.lower()
+    
+    # Remove common prefixes
+    if parts[0].lower() in _HOST_PREFIXES and len(parts) > 2:
+        parts = parts[1:]
+    
+    # Get domain without extension
+    domain_name = parts[0]
+    
+    # Clean domain name for filesystem
+    return domain_name.translate(_DOMAIN_CHAR_TABLE).lower()
+
+
+class _PageSnapshot(NamedTuple):
+    """The fields of a scraped page that change detection compares (no html/md bodies)"""
+    title: str
+    hash: str
+    status: Optional[int]
+    etag: str
+    last_modified: str
 
 
 class DiffPipeline:
     """Pipeline to track changes and generate changelog.md per domain"""
     
     def __init__(self):
-        self.current_sources_by_domain = {}  # domain -> {url: item}
-        self.previous_sources_by_domain = {}  # domain -> {url: item}
+        self.current_sources_by_domain = {}  # domain -> {url: _PageSnapshot}
+        self.previous_sources_by_domain = {}  # domain -> {url: _PageSnapshot}
         self.changes_by_domain = {}  # domain -> changes dict
 
     def open_spider(self, spider):
@@ -24,38 +74,19 @@ class DiffPipeline:
 
     def process_item(self, item, spider):
         """Track current items for comparison by domain"""
-        if item.get('url'):
-            # Extract domain from URL
-            domain = self._extract_domain_from_url(item['url'])
+        if item.url:
+            # Extract domain from URL (both lookups are cached, so this is two dict hits)
+            domain = _extract_domain_principal(parse_url(item.url).netloc)
             
-            if domain not in self.current_sources_by_domain:
-                self.current_sources_by_domain[domain] = {}
+            sources = self.current_sources_by_domain.get(domain)
+            if sources is None:
+                sources = self.current_sources_by_domain[domain] = {}
             
-            self.current_sources_by_domain[domain][item['url']] = dict(item)
+            # Keep only what _detect_content_change reads, not a copy of the whole page
+            sources[item.url] = _PageSnapshot(
+                item.title, item.hash, item.status, item.etag, item.last_modified
+            )
         return item
-    
-    def _extract_domain_from_url(self, url):
-        """Extract domain principal from URL - same logic as AssemblePipeline"""
-        parsed = urlparse(url)
-        hostname = parsed.netloc.split(':')[0]
-        parts = hostname.split('.')
-        
-        if len(parts) < 2:
-            return hostname.lower()
-        
-        # Remove common prefixes
-        prefixes_to_remove = ['www', 'docs', 'api', 'blog', 'help', 'support']
-        if parts[0].lower() in prefixes_to_remove and len(parts) > 2:
-            parts = parts[1:]
-        
-        # Get domain without extension
-        domain_name = parts[0]
-        
-        # Clean domain name for filesystem
-        import re
-        domain_name = re.sub(r'[^a-zA-Z0-9\-_]', '-', domain_name)
-        
-        return domain_name.lower()
 
     def close_spider(self, spider):
         """Generate changelog for each domain"""
@@ -85,18 +116,20 @@ class DiffPipeline:
             'added': [],
             'modified': [],
             'removed': [],
-            'unchanged': []
+            # Unchanged pages are only ever counted, so don't build a list for them
+            'unchanged_count': 0
         }
         
-        current_urls = set(current_sources.keys())
-        previous_urls = set(previous_sources.keys())
+        # dict key views support set operations directly, without copying the keys into sets
+        current_urls = current_sources.keys()
+        previous_urls = previous_sources.keys()
         
         # Find added URLs
         added_urls = current_urls - previous_urls
         for url in added_urls:
             changes['added'].append({
                 'url': url,
-                'title': current_sources[url].get('title', ''),
+                'title': current_sources[url].title,
                 'status': 'new'
             })
         
@@ -105,61 +138,64 @@ class DiffPipeline:
         for url in removed_urls:
             changes['removed'].append({
                 'url': url,
-                'title': previous_sources[url].get('title', ''),
+                'title': previous_sources[url].title,
                 'status': 'removed'
             })
         
-        # Find common URLs and check for modifications
-        common_urls = current_urls & previous_urls
-        for url in common_urls:
-            current = current_sources[url]
-            previous = previous_sources[url]
+        # Check pages present in both crawls for modifications
+        # (items() + get() looks each URL up once instead of building an intersection set)
+        for url, current in current_sources.items():
+            previous = previous_sources.get(url)
+            if previous is None:
+                continue
             
             change_detected = self._detect_content_change(current, previous)
             
             if change_detected:
                 changes['modified'].append({
                     'url': url,
-                    'title': current.get('title', ''),
+                    'title': current.title,
                     'changes': change_detected
                 })
             else:
-                changes['unchanged'].append({
-                    'url': url,
-                    'title': current.get('title', '')
-                })
+                changes['unchanged_count'] += 1
         
         self.changes_by_domain[domain] = changes
 
-    def _detect_content_change(self, current: Dict, previous: Dict) -> List[str]:
+    def _detect_content_change(self, current: _PageSnapshot, previous: _PageSnapshot) -> List[str]:
         """Detect what changed between two versions of a page"""
+        # Fast path for the common case: an identical snapshot cannot have changed.
+        # (Equal hashes alone aren't enough - title, status and ETag are compared too.)
+        if current == previous:
+            return []
+        
         changes = []
         
         # Check content hash
-        current_hash = current.get('hash', '')
-        previous_hash = previous.get('hash', '')
+        current_hash = current.hash
+        previous_hash = previous.hash
         if current_hash and previous_hash and current_hash != previous_hash:
             changes.append('content')
         
         # Check title
-        if current.get('title', '') != previous.get('title', ''):
+        if current.title != previous.title:
             changes.append('title')
         
         # Check HTTP status
-        if current.get('status') != previous.get('status'):
+        if current.status != previous.status:
             changes.append('status')
         
         # Check ETag (if available)
-        current_etag = current.get('etag', '')
-        previous_etag = previous.get('etag', '')
+        current_etag = current.etag
+        previous_etag = previous.etag
         if current_etag and previous_etag and current_etag != previous_etag:
             if 'content' not in changes:  # Don't duplicate if hash already detected change
                 changes.append('etag')
         
         # Check Last-Modified (if available and no other changes detected)
         if not changes:
-            current_modified = current.get('last_modified', '')
-            previous_modified = previous.get('last_modified', '')
+            current_modified = current.last_modified
+            previous_modified = previous.last_modified
             if current_modified and previous_modified and current_modified != previous_modified:
                 changes.append('last_modified')
         
@@ -168,8 +204,9 @@ class DiffPipeline:
     def _generate_changelog_for_domain(self, domain):
         """Generate changelog.md for a specific domain"""
         
-        # For now, we'll just log the changes instead of writing to a file
-        changelog_content = self._build_changelog_content_for_domain(domain)
+        # For now, we'll just log the changes instead of writing to a file.
+        # The markdown is only rendered (_build_changelog_content_for_domain) once
+        # there is a file to write it to; building it just to discard it is wasted work.
         self.spider.logger.info(f"Changes for domain {domain} tracked (changelog generation disabled)")
 
     def _build_changelog_content_for_domain(self, domain) -> str:
@@ -199,7 +236,7 @@ class DiffPipeline:
             f'  - Added: {len(changes.get("added", []))}',
             f'  - Modified: {len(changes.get("modified", []))}', 
             f'  - Removed: {len(changes.get("removed", []))}',
-            f'  - Unchanged: {len(changes.get("unchanged", []))}',
+            f'  - Unchanged: {changes.get("unchanged_count", 0)}',
             ''
         ])
         
@@ -257,17 +294,18 @@ class DiffPipeline:
         added_count = len(changes.get('added', []))
         modified_count = len(changes.get('modified', []))
         removed_count = len(changes.get('removed', []))
-        unchanged_count = len(changes.get('unchanged', []))
+        unchanged_count = changes.get('unchanged_count', 0)
         
-        self.spider.logger.info(
-            f"Change summary for {domain}: +{added_count} ~{modified_count} -{removed_count} ={unchanged_count}"
-        )
+        # One log record per domain: the summary line plus a preview of each non-empty category
+        lines = [f"Change summary for {domain}: +{added_count} ~{modified_count} -{removed_count} ={unchanged_count}"]
         
         if added_count > 0:
-            self.spider.logger.info(f"Added pages ({domain}): {', '.join(item['url'] for item in changes['added'][:5])}{'...' if added_count > 5 else ''}")
+            lines.append(f"Added pages ({domain}): {', '.join(item['url'] for item in changes['added'][:5])}{'...' if added_count > 5 else ''}")
         
         if modified_count > 0:
-            self.spider.logger.info(f"Modified pages ({domain}): {', '.join(item['url'] for item in changes['modified'][:5])}{'...' if modified_count > 5 else ''}")
+            lines.append(f"Modified pages ({domain}): {', '.join(item['url'] for item in changes['modified'][:5])}{'...' if modified_count > 5 else ''}")
         
         if removed_count > 0:
-            self.spider.logger.info(f"Removed pages ({domain}): {', '.join(item['url'] for item in changes['removed'][:5])}{'...' if removed_count > 5 else ''}")
\ No newline at end of file
+            lines.append(f"Removed pages ({domain}): {', '.join(item['url'] for item in changes['removed'][:5])}{'...' if removed_count > 5 else ''}")
+        
+        self.spider.logger.info('\n'.join(lines))
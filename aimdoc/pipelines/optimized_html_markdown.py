@@ -1,9 +1,33 @@
 import re
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup, Comment
+from bs4 import BeautifulSoup, Comment, NavigableString
 import markdownify
 from datetime import datetime, timezone
 
+from ..utils import parse_url
+
+# Regex patterns used per page/element, compiled once at import
+_WHITESPACE_RE = re.compile(r'\s+')
+# ATX heading lines; [^\S\n] keeps the separator from spanning lines in multiline mode
+_HEADING_LINE_RE = re.compile(r'^(#{1,6})[^\S\n]+(.+)', re.MULTILINE)
+_H1_LINE_RE = re.compile(r'^#[^\S\n]+(.+)', re.MULTILINE)
+_SUBHEADING_LINE_RE = re.compile(r'^(#{2,6})[^\S\n]+(.+)', re.MULTILINE)
+_CODE_BLOCK_RESTORE_RE = re.compile(r'<div data-markdown-code-block="[^"]*">(.*?)</div>', re.DOTALL)
+_IMAGE_RESTORE_RE = re.compile(r'<span data-markdown-image="true">(.*?)</span>', re.DOTALL)
+_EXCESSIVE_NEWLINES_RE = re.compile(r'\n{3,}')
+# Root-relative URL that urljoin returns unchanged apart from the prepended origin:
+# no '//', dot segments, ';' params, tab/newline (stripped by urlsplit) or empty ?/#
+_PLAIN_ROOT_PATH_RE = re.compile(r'(?:/(?![/.])[^/;?#\t\n\r]*)+(?:\?[^#\t\n\r]+)?(?:#[^\t\n\r]+)?')
+# language-xxx / lang-xxx / highlight-xxx classes, or a simple language name as the whole class
+_LANGUAGE_CLASS_RE = re.compile(r'(?:language-|lang-|highlight-)(\w+)|(\w+)$')
+_LANGUAGE_ALIASES = {
+    'js': 'javascript',
+    'ts': 'typescript',
+    'py': 'python',
+    'rb': 'ruby',
+    'sh': 'bash',
+}
+
 
 class OptimizedHtmlMarkdownPipeline:
     """Optimized pipeline that combines HTML cleaning and markdown conversion in one pass"""
@@ -35,6 +59,11 @@ class OptimizedHtmlMarkdownPipeline:
             'deprecated', 'legacy'
         ]
         
+        # Both lists joined into one selector group so the tree is matched in a single pass
+        self._remove_selector = ', '.join(
+            self.remove_selectors + [f'.{class_name}' for class_name in self.noise_classes]
+        )
+        
         # Configure markdownify options
         self.md_options = {
             'heading_style': markdownify.ATX,  # Use # for headings
@@ -44,31 +73,23 @@ class OptimizedHtmlMarkdownPipeline:
             'escape_asterisks': False,
             'escape_underscores': False,
         }
+        # Built once and reused for every page; the converter keeps no per-page state
+        self._md_converter = markdownify.MarkdownConverter(**self.md_options)
         
-        # Pre-compile regex patterns for performance
-        self._compiled_regexes = {
-            'whitespace': re.compile(r'\s+'),
-            'heading_match': re.compile(r'^(#{1,6})\s+(.+)'),
-            'admonition_type': re.compile(r'^\*\*\w+:\*\*'),
-            'code_block_restore': re.compile(r'<div data-markdown-code-block="[^"]*">(.*?)</div>', re.DOTALL),
-            'image_restore': re.compile(r'<span data-markdown-image="true">(.*?)</span>', re.DOTALL),
-            'excessive_newlines': re.compile(r'\n{3,}'),
-            'language_patterns': [
-                re.compile(r'language-(\w+)'),
-                re.compile(r'lang-(\w+)'), 
-                re.compile(r'highlight-(\w+)'),
-                re.compile(r'^(\w+)$')  # Simple language names
-            ]
-        }
+        # Code block patterns, see _normalize_code_blocks
+        self._code_block_selectors = (
+            'pre code',
+            ', '.join(['pre.highlight', '.highlight pre', '.code-block pre', '.codehilite pre']),
+        )
     
     def process_item(self, item, spider):
         """Process HTML item in one pass - clean and convert to markdown"""
-        if not item.get('html'):
-            item['md'] = ''
+        if not item.html:
+            item.md = ''
             return item
             
         # Single HTML parsing - parse only once
-        soup = BeautifulSoup(item['html'], 'html.parser')
+        soup = BeautifulSoup(item.html, 'lxml')
         
         # Phase 1: Clean HTML (remove unwanted elements)
         self._remove_unwanted_elements(soup)
@@ -77,37 +98,29 @@ class OptimizedHtmlMarkdownPipeline:
         self._normalize_structure(soup)
         
         # Phase 3: Convert relative URLs to absolute
-        self._absolutify_urls(soup, item['url'])
+        self._absolutify_urls(soup, item.url)
         
         # Phase 4: Preprocess for markdown conversion
         self._preprocess_for_markdown(soup)
         
-        # Phase 5: Convert to markdown
-        html_content = str(soup)
-        markdown_content = markdownify.markdownify(html_content, **self.md_options)
+        # Phase 5: Convert to markdown straight from the tree, without
+        # serializing it to a string for markdownify to parse all over again
+        markdown_content = self._md_converter.convert_soup(soup)
         
         # Phase 6: Post-process markdown
-        markdown_content = self._postprocess_markdown(markdown_content, item['url'])
+        markdown_content = self._postprocess_markdown(markdown_content, item.url, item.fetched_at)
         
-        # Update both fields
-        item['html'] = html_content  # Store cleaned HTML
-        item['md'] = markdown_content
+        item.md = markdown_content
         
         return item
 
     def _remove_unwanted_elements(self, soup):
         """Remove navigation, headers, footers, and other unwanted elements"""
         
-        # Remove elements by selector
-        for selector in self.remove_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                element.decompose()
-        
-        # Remove elements with noise classes
-        for class_name in self.noise_classes:
-            elements = soup.select(f'.{class_name}')
-            for element in elements:
+        # Remove elements by selector and noise class (one combined select)
+        for element in soup.select(self._remove_selector):
+            # Matches nested inside an already removed element are gone with it
+            if not element.decomposed:
                 element.decompose()
         
         # Remove HTML comments
@@ -119,7 +132,11 @@ class OptimizedHtmlMarkdownPipeline:
         for tag_name in ['p', 'div', 'span']:
             elements = soup.find_all(tag_name)
             for element in elements:
-                if not element.get_text(strip=True) and not element.find(['img', 'svg', 'iframe']):
+                if element.decomposed:
+                    continue
+                # A childless element is empty; skip the text and media scans for it
+                if not element.contents or (
+                        not element.get_text(strip=True) and not element.find(['img', 'svg', 'iframe'])):
                     element.decompose()
 
     def _normalize_structure(self, soup):
@@ -128,8 +145,8 @@ class OptimizedHtmlMarkdownPipeline:
         # Fix heading hierarchy - ensure no jumps (h1->h3 without h2)
         headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
         if headings:
-            # Start from h2 if we have h1, otherwise from h1
-            current_level = 2 if soup.find('h1') else 1
+            # Start from h2 if we have h1, otherwise from h1 (the list already holds every h1)
+            current_level = 2 if any(heading.name == 'h1' for heading in headings) else 1
             
             for heading in headings[1:]:  # Skip first heading
                 heading_level = int(heading.name[1])
@@ -150,23 +167,22 @@ class OptimizedHtmlMarkdownPipeline:
         
         # Clean up whitespace in text nodes (use pre-compiled regex)
         for text_node in soup.find_all(string=True):
-            if text_node.parent.name not in ['pre', 'code']:
-                normalized = self._compiled_regexes['whitespace'].sub(' ', text_node).strip()
-                text_node.replace_with(normalized)
+            if text_node.parent.name in ('pre', 'code'):
+                continue
+            normalized = _WHITESPACE_RE.sub(' ', text_node).strip()
+            # Most nodes are already clean: skip the tree surgery for them. Other string
+            # types (doctype, CDATA, ...) are still replaced, which turns them into plain text.
+            if normalized == text_node and type(text_node) is NavigableString:
+                continue
+            text_node.replace_with(normalized)
 
     def _normalize_code_blocks(self, soup):
         """Normalize code blocks for better markdown conversion"""
         
-        # Handle various code block patterns
-        code_selectors = [
-            'pre code',
-            'pre.highlight',
-            '.highlight pre',
-            '.code-block pre',
-            '.codehilite pre'
-        ]
-        
-        for selector in code_selectors:
+        # Handle various code block patterns: <code> inside <pre> first, so the code's own
+        # classes decide the language, then every <pre> wrapper pattern in one combined select
+        # (each <pre> is visited once instead of once per matching selector)
+        for selector in self._code_block_selectors:
             elements = soup.select(selector)
             for element in elements:
                 # Extract language from class names
@@ -195,29 +211,21 @@ class OptimizedHtmlMarkdownPipeline:
                 pre['class'] = ['highlight'] if language else []
 
     def _extract_language(self, element):
-        """Extract programming language from element classes using pre-compiled patterns"""
-        classes = []
-        
-        # Check element and its parents for language indicators
-        for elem in [element, element.parent, element.find_parent()]:
-            if elem and elem.get('class'):
-                classes.extend(elem.get('class', []))
-        
-        # Use pre-compiled regex patterns for performance
+        """Extract programming language from element classes using a pre-compiled pattern"""
+        # Element classes first, then the parent's (find_parent() with no filter is the
+        # same node as .parent, so it is read once); dict keys drop repeats in order
+        classes = dict.fromkeys(element.get('class') or ())
+        parent = element.parent
+        if parent is not None:
+            classes.update(dict.fromkeys(parent.get('class') or ()))
+        
+        # One match per class covers all the accepted spellings
         for class_name in classes:
-            for pattern in self._compiled_regexes['language_patterns']:
-                match = pattern.match(class_name)
-                if match:
-                    lang = match.group(1).lower()
-                    # Map some common aliases
-                    lang_map = {
-                        'js': 'javascript',
-                        'ts': 'typescript',
-                        'py': 'python',
-                        'rb': 'ruby',
-                        'sh': 'bash'
-                    }
-                    return lang_map.get(lang, lang)
+            match = _LANGUAGE_CLASS_RE.match(class_name)
+            if match:
+                lang = (match.group(1) or match.group(2)).lower()
+                # Map some common aliases
+                return _LANGUAGE_ALIASES.get(lang, lang)
         
         return None
 
@@ -246,9 +254,12 @@ class OptimizedHtmlMarkdownPipeline:
                     type_elem.string = f"{admonition_type.title()}: "
                     blockquote.append(type_elem)
                 
-                # Move content
+                # Move content. The first <p> child reached is kept in place (only its text is
+                # copied), so a flag replaces re-running element.find('p') for every child.
+                first_p_done = False
                 for child in list(element.children):
-                    if child.name == 'p' and child == element.find('p'):
+                    if child.name == 'p' and not first_p_done:
+                        first_p_done = True
                         # First paragraph - append to same line as type
                         if blockquote.contents:
                             blockquote.contents[-1].append(child.get_text())
@@ -289,61 +300,67 @@ class OptimizedHtmlMarkdownPipeline:
     def _absolutify_urls(self, soup, base_url):
         """Convert relative URLs to absolute URLs"""
         
-        # Process links
-        for link in soup.find_all('a', href=True):
-            href = link.get('href')
-            if href and not href.startswith(('http://', 'https://', 'mailto:', '#')):
-                absolute_url = urljoin(base_url, href)
-                link['href'] = absolute_url
-        
-        # Process images
-        for img in soup.find_all('img', src=True):
-            src = img.get('src')
-            if src and not src.startswith(('http://', 'https://', 'data:')):
-                absolute_url = urljoin(base_url, src)
-                img['src'] = absolute_url
+        # Root-relative URLs that urljoin would leave untouched only need the base origin
+        # prepended, which skips urljoin's parse/unparse for most sidebar and nav links
+        base = parse_url(base_url)
+        base_root = f'{base.scheme}://{base.netloc}' if base.scheme in ('http', 'https') and base.netloc else None
+        
+        # Links and images are fixed up in a single walk of the tree
+        for tag in soup.find_all(['a', 'img']):
+            if tag.name == 'a':
+                href = tag.get('href')
+                if href and not href.startswith(('http://', 'https://', 'mailto:', '#')):
+                    if base_root and _PLAIN_ROOT_PATH_RE.fullmatch(href):
+                        tag['href'] = base_root + href
+                    else:
+                        tag['href'] = urljoin(base_url, href)
+            else:
+                src = tag.get('src')
+                if src and not src.startswith(('http://', 'https://', 'data:')):
+                    if base_root and _PLAIN_ROOT_PATH_RE.fullmatch(src):
+                        tag['src'] = base_root + src
+                    else:
+                        tag['src'] = urljoin(base_url, src)
 
     def _preprocess_for_markdown(self, soup):
-        """Preprocess HTML elements for better markdown conversion"""
-        
-        # Handle code blocks
-        self._preprocess_code_blocks(soup)
-        
-        # Handle tables
-        self._preprocess_tables(soup)
-        
-        # Handle admonitions
-        self._preprocess_admonitions(soup)
-        
-        # Handle images
-        self._preprocess_images(soup)
+        """
+        Preprocess HTML elements for better markdown conversion.
+        One walk over the tree handles every element type; document order visits a
+        <pre> before anything nested in it, so code text is read before images are replaced.
+        """
+        for element in soup.find_all(['pre', 'table', 'img']):
+            tag_name = element.name
+            if tag_name == 'pre':
+                # Handle code blocks
+                self._preprocess_code_block(element, soup)
+            elif tag_name == 'table':
+                # Handle tables
+                self._preprocess_table(element, soup)
+            else:
+                # Handle images
+                self._preprocess_image(element, soup)
 
-    def _preprocess_code_blocks(self, soup):
-        """Ensure code blocks are properly formatted for markdown"""
-        
-        # Find all code blocks
-        code_blocks = soup.find_all('pre')
-        
-        for pre in code_blocks:
-            code = pre.find('code')
-            if code:
-                # Extract language from class (reuse existing method)
-                language = self._extract_code_language(code)
-                
-                # Get code content
-                content = code.get_text()
-                
-                # Create markdown code block
-                if language:
-                    markdown_block = f"\n```{language}\n{content}\n```\n"
-                else:
-                    markdown_block = f"\n```\n{content}\n```\n"
-                
-                # Replace with a special marker that markdownify won't touch
-                marker_id = id(pre)
-                marker = soup.new_tag('div', **{'data-markdown-code-block': str(marker_id)})
-                marker.string = markdown_block
-                pre.replace_with(marker)
+    def _preprocess_code_block(self, pre, soup):
+        """Ensure a code block is properly formatted for markdown"""
+        code = pre.find('code')
+        if code:
+            # Extract language from class (reuse existing method)
+            language = self._extract_code_language(code)
+            
+            # Get code content
+            content = code.get_text()
+            
+            # Create markdown code block
+            if language:
+                markdown_block = f"\n```{language}\n{content}\n```\n"
+            else:
+                markdown_block = f"\n```\n{content}\n```\n"
+            
+            # Replace with a special marker that markdownify won't touch
+            marker_id = id(pre)
+            marker = soup.new_tag('div', **{'data-markdown-code-block': str(marker_id)})
+            marker.string = markdown_block
+            pre.replace_with(marker)
 
     def _extract_code_language(self, code_element):
         """Extract programming language from code element classes"""
@@ -357,104 +374,71 @@ class OptimizedHtmlMarkdownPipeline:
         
         return None
 
-    def _preprocess_tables(self, soup):
-        """Ensure tables are preserved properly"""
-        tables = soup.find_all('table')
-        
-        for table in tables:
-            # Add border attribute to ensure markdownify recognizes it as a table
-            table['border'] = '1'
-            
-            # Ensure proper table structure
-            tbody = table.find('tbody')
-            if not tbody:
-                # Wrap existing rows in tbody
-                rows = table.find_all('tr')
-                if rows:
-                    tbody = soup.new_tag('tbody')
-                    for row in rows:
-                        tbody.append(row.extract())
-                    table.append(tbody)
-
-    def _preprocess_admonitions(self, soup):
-        """Handle admonitions (notes, warnings, etc.) using pre-compiled regex"""
-        blockquotes = soup.find_all('blockquote')
-        
-        for bq in blockquotes:
-            # Check if this is an admonition (starts with **Type:**) using pre-compiled regex
-            first_text = bq.get_text().strip()
-            if self._compiled_regexes['admonition_type'].match(first_text):
-                # This is an admonition, preserve it as blockquote
-                continue
+    def _preprocess_table(self, table, soup):
+        """Ensure a table is preserved properly"""
+        # Add border attribute to ensure markdownify recognizes it as a table
+        table['border'] = '1'
+        
+        # Ensure proper table structure
+        tbody = table.find('tbody')
+        if not tbody:
+            # Wrap existing rows in tbody
+            rows = table.find_all('tr')
+            if rows:
+                tbody = soup.new_tag('tbody')
+                for row in rows:
+                    tbody.append(row.extract())
+                table.append(tbody)
 
-    def _preprocess_images(self, soup):
-        """Handle images for markdown conversion"""
-        images = soup.find_all('img')
-        
-        for img in images:
-            src = img.get('src', '')
-            alt = img.get('alt', '')
-            title = img.get('title', '')
-            
-            # Create markdown image syntax
-            if title:
-                markdown_img = f'![{alt}]({src} "{title}")'
-            else:
-                markdown_img = f'![{alt}]({src})'
-            
-            # Replace with markdown
-            marker = soup.new_tag('span', **{'data-markdown-image': 'true'})
-            marker.string = markdown_img
-            img.replace_with(marker)
+    def _preprocess_image(self, img, soup):
+        """Handle an image for markdown conversion"""
+        src = img.get('src', '')
+        alt = img.get('alt', '')
+        title = img.get('title', '')
+        
+        # Create markdown image syntax
+        if title:
+            markdown_img = f'![{alt}]({src} "{title}")'
+        else:
+            markdown_img = f'![{alt}]({src})'
+        
+        # Replace with markdown
+        marker = soup.new_tag('span', **{'data-markdown-image': 'true'})
+        marker.string = markdown_img
+        img.replace_with(marker)
 
-    def _postprocess_markdown(self, markdown_content, source_url):
+    def _postprocess_markdown(self, markdown_content, source_url, fetched_at=''):
         """Clean up and enhance the generated markdown using pre-compiled regexes"""
         
         # Restore custom code blocks (use pre-compiled regex)
-        markdown_content = self._compiled_regexes['code_block_restore'].sub(
+        markdown_content = _CODE_BLOCK_RESTORE_RE.sub(
             r'\1', markdown_content
         )
         
         # Restore custom images (use pre-compiled regex)
-        markdown_content = self._compiled_regexes['image_restore'].sub(
+        markdown_content = _IMAGE_RESTORE_RE.sub(
             r'\1', markdown_content
         )
         
-        # Fix heading levels - ensure single # for page title
-        lines = markdown_content.split('\n')
-        processed_lines = []
-        found_first_heading = False
-        
-        for line in lines:
-            # Check if this is a heading (use pre-compiled regex)
-            heading_match = self._compiled_regexes['heading_match'].match(line)
-            if heading_match:
-                level = len(heading_match.group(1))
-                title = heading_match.group(2)
-                
-                if not found_first_heading:
-                    # First heading becomes h1
-                    processed_lines.append(f'# {title}')
-                    found_first_heading = True
-                else:
-                    # Subsequent headings start at h2
-                    new_level = max(2, level)
-                    processed_lines.append(f'{"#" * new_level} {title}')
-            else:
-                processed_lines.append(line)
-        
-        markdown_content = '\n'.join(processed_lines)
+        # Fix heading levels - ensure single # for page title: the first heading becomes h1,
+        # later h1s are demoted to h2. Done with multiline substitutions instead of a per-line loop.
+        first_heading = _HEADING_LINE_RE.search(markdown_content)
+        if first_heading:
+            rest = markdown_content[first_heading.end():]
+            rest = _H1_LINE_RE.sub(r'## \1', rest)
+            rest = _SUBHEADING_LINE_RE.sub(r'\1 \2', rest)
+            markdown_content = f'{markdown_content[:first_heading.start()]}# {first_heading.group(2)}{rest}'
         
         # Clean up excessive whitespace (use pre-compiled regex)
-        markdown_content = self._compiled_regexes['excessive_newlines'].sub('\n\n', markdown_content)
+        markdown_content = _EXCESSIVE_NEWLINES_RE.sub('\n\n', markdown_content)
         
         # Add source block at the end
-        source_block = self._create_source_block(source_url)
+        source_block = self._create_source_block(source_url, fetched_at)
         markdown_content = f'{markdown_content.strip()}\n\n{source_block}'
         
         return markdown_content.strip()
 
-    def _create_source_block(self, url):
-        """Create source attribution block"""
-        timestamp = datetime.now(timezone.utc).isoformat()
+    def _create_source_block(self, url, fetched_at=''):
+        """Create source attribution block, stamped with the time the spider fetched the page"""
+        timestamp = fetched_at or datetime.now(timezone.utc).isoformat()
         return f'<!-- source: {url} | fetched: {timestamp} -->'
\ No newline at end of file
@@ -1,9 +1,10 @@
-import json
 import os
 import threading
 import time
 from pathlib import Path
 
+from ..utils import write_json
+
 
 class ProgressTrackerPipeline:
     """
@@ -11,6 +12,10 @@ class ProgressTrackerPipeline:
     instead of writing files to disk for better performance.
     """
     
+    # status.json is rewritten at most every STATUS_WRITE_INTERVAL seconds or STATUS_WRITE_EVERY pages
+    STATUS_WRITE_INTERVAL = 0.2
+    STATUS_WRITE_EVERY = 50
+    
     def __init__(self):
         self.pages_scraped = 0
         self.files_created = 0
@@ -18,6 +23,7 @@ class ProgressTrackerPipeline:
         self.sitemap_processed = False
         self.manifest_path = None
         self._lock = threading.RLock()  # Thread-safe updates
+        self._last_status_write = 0.0
         
     def open_spider(self, spider):
         """Initialize progress tracking for the spider."""
@@ -34,7 +40,7 @@ class ProgressTrackerPipeline:
         
     def process_item(self, item, spider):
         """Track item processing with minimal overhead."""
-        if item.get('md'):
+        if item.md:
             with self._lock:
                 self.pages_scraped += 1
                 
@@ -75,10 +81,10 @@ class ProgressTrackerPipeline:
             if files_from_stats > 0:
                 self.files_created = files_from_stats
         
-        # Final stats update
-        self._update_spider_stats()
+        # Final stats update, always flushing the status file
+        self._update_spider_stats(force_status_write=True)
     
-    def _update_spider_stats(self):
+    def _update_spider_stats(self, force_status_write=False):
         """Update spider stats in memory and notify CLI if callback exists."""
         if not hasattr(self.spider, 'crawler') or not hasattr(self.spider.crawler, 'stats'):
             return
@@ -94,7 +100,7 @@ class ProgressTrackerPipeline:
             self._update_cli_progress()
             
             # Write minimal status file for legacy compatibility (if manifest_path exists)
-            if self.manifest_path:
+            if self.manifest_path and (force_status_write or self._status_write_due()):
                 self._write_minimal_status()
     
     def _update_cli_progress(self):
@@ -119,6 +125,11 @@ class ProgressTrackerPipeline:
             if hasattr(progress_callback, 'update_conversion'):
                 progress_callback.update_conversion(self.files_created)
     
+    def _status_write_due(self):
+        """Throttle status.json rewrites so they don't happen for every single page."""
+        return (time.monotonic() - self._last_status_write >= self.STATUS_WRITE_INTERVAL
+                or self.pages_scraped % self.STATUS_WRITE_EVERY == 0)
+    
     def _write_minimal_status(self):
         """Write minimal status file for cross-process monitoring."""
         if not self.manifest_path:
@@ -136,9 +147,11 @@ class ProgressTrackerPipeline:
                 "sitemap_processed": self.sitemap_processed
             }
             
-            # Write directly, no temp file needed for this tiny file
-            with open(status_file, 'w') as f:
-                json.dump(status_data, f)
+            # Write to a temp file and rename so concurrent readers never see a partial file
+            tmp_file = status_file + ".tmp"
+            write_json(tmp_file, status_data, indent=False)
+            os.replace(tmp_file, status_file)
+            self._last_status_write = time.monotonic()
                 
         except Exception as e:
             # Silently fail to avoid spider disruption
@@ -1,14 +1,14 @@
-import json
 import hashlib
+import logging
 import re
 from datetime import datetime, timezone
-from urllib.parse import urlparse
 from xml.etree import ElementTree
 
 import scrapy
 from scrapy import Request
 
 from ..items import DocPage
+from ..utils import parse_url, read_json, write_json
 
 
 class AimdocSpider(scrapy.Spider):
@@ -20,16 +20,20 @@ class AimdocSpider(scrapy.Spider):
         "AUTOTHROTTLE_ENABLED": True,
     }
 
-    def __init__(self, manifest, job_dir=None, *args, **kwargs):
+    def __init__(self, manifest=None, job_dir=None, *args, manifest_data=None, **kwargs):
         super().__init__(*args, **kwargs)
         
         # Store manifest path for progress file
         self.manifest_path = manifest
         self.job_dir = job_dir
         
-        # Load manifest file
-        with open(manifest, 'r', encoding='utf-8') as f:
-            self.manifest = json.load(f)
+        # Prefer an in-memory manifest (CLI mode), otherwise load the manifest file
+        if manifest_data is not None:
+            self.manifest = manifest_data
+        elif manifest:
+            self.manifest = read_json(manifest)
+        else:
+            raise ValueError("Either 'manifest' or 'manifest_data' must be provided")
         self.discovered_urls = set()
         self.chapter_order = {}
         self.chapters = {}  # Store chapter information extracted from URLs
@@ -57,6 +61,9 @@ class AimdocSpider(scrapy.Spider):
         
         # Pre-compile regex patterns for performance optimization
         self._whitespace_pattern = re.compile(r'\s+')
+        
+        # Whether per-page debug logs are emitted; resolved in start() once logging is configured
+        self._log_debug = False
 
     def _generate_discovery_urls(self):
         """Generate discovery URLs from base URL"""
@@ -69,6 +76,9 @@ class AimdocSpider(scrapy.Spider):
     
     async def start(self):
         """Generate initial requests for automatic discovery (async version)"""
+        # Checked once so the per-page path can skip building its log messages entirely
+        self._log_debug = self.logger.isEnabledFor(logging.DEBUG)
+        
         self.logger.info(f"=== SPIDER START ===")
         self.logger.info(f"Base URL: {self.base_url}")
         self.logger.info(f"Project: {self.name_project}")
@@ -150,8 +160,9 @@ class AimdocSpider(scrapy.Spider):
 
     def parse_page(self, response):
         """Main parsing method for documentation pages"""
-        self.logger.info(f"=== PARSING PAGE: {response.url} ===")
-        self.logger.info(f"Status: {response.status}, Size: {len(response.body)} bytes")
+        if self._log_debug:
+            self.logger.debug(f"=== PARSING PAGE: {response.url} ===")
+            self.logger.debug(f"Status: {response.status}, Size: {len(response.body)} bytes")
         
         # Check for HTTP errors
         if response.status >= 400:
@@ -167,11 +178,12 @@ class AimdocSpider(scrapy.Spider):
         # Extract page content
         try:
             item = self._extract_page_content(response)
-            self.logger.info(f"Extracted item: title='{item['title']}', content_length={len(item['html'])}")
+            if self._log_debug:
+                self.logger.debug(f"Extracted item: title='{item.title}', content_length={len(item.html)}")
             
             # Check if we got meaningful content
-            if not item['html'] or len(item['html'].strip()) < 100:
-                self.logger.warning(f"⚠️ Page {response.url} has very little content: {len(item['html'])} chars")
+            if not item.html or len(item.html.strip()) < 100:
+                self.logger.warning(f"⚠️ Page {response.url} has very little content: {len(item.html)} chars")
             
             yield item
             
@@ -392,7 +404,7 @@ class AimdocSpider(scrapy.Spider):
     
     def _extract_chapter_from_url(self, url):
         """Extract chapter information from URL structure - generic implementation"""
-        parsed = urlparse(url)
+        parsed = parse_url(url)
         path_parts = [part for part in parsed.path.split('/') if part]
         
         # Default values
@@ -537,8 +549,15 @@ class AimdocSpider(scrapy.Spider):
         # Write final summary to progress file
         try:
             import os
-            manifest_dir = os.path.dirname(self.manifest_path) if hasattr(self, 'manifest_path') else os.getcwd()
-            summary_file = os.path.join(manifest_dir, "scraping_summary.json")
+            if self.manifest_path:
+                summary_dir = os.path.dirname(self.manifest_path)
+            elif self.job_dir:
+                summary_dir = self.job_dir
+            else:
+                # In-memory manifest without a job directory: nowhere to put the summary
+                self.logger.info("No manifest file or job directory, skipping scraping summary")
+                return
+            summary_file = os.path.join(summary_dir, "scraping_summary.json")
             
             discovery_errors = getattr(self, 'discovery_errors', [])
             summary_data = {
@@ -552,8 +571,7 @@ class AimdocSpider(scrapy.Spider):
                 "chapters": self.chapters
             }
             
-            with open(summary_file, 'w', encoding='utf-8') as f:
-                json.dump(summary_data, f, indent=2)
+            write_json(summary_file, summary_data)
             self.logger.info(f"📄 Summary written to: {summary_file}")
             
         except Exception as e:
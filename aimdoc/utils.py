@@ -0,0 +1,41 @@
+"""
+Shared helpers for the spider and pipelines
+"""
+
+import functools
+import json
+from urllib.parse import urlparse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional (pip install aimdoc[fast]), fall back to the stdlib
+    orjson = None
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_url(url: str):
+    """
+    Cached urlparse. The same page URL is parsed by the spider and again by each
+    pipeline; the result is an immutable namedtuple so it is safe to share.
+    """
+    return urlparse(url)
+
+
+def read_json(path):
+    """Load a JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path, data, indent: bool = True):
+    """Serialize data to a JSON file, using orjson when it is installed"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=option))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2 if indent else None)
@@ -37,6 +37,9 @@ setup(
         "typer>=0.9.0",
         "pydantic>=2.5.0",
     ],
+    extras_require={
+        "fast": ["orjson>=3.9.0"],
+    },
     entry_points={
         "console_scripts": [
             "aimdoc=aimdoc.__main__:main",